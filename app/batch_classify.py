@@ -0,0 +1,181 @@
+# Classifies every image in a directory tree or zip archive and writes one result per image
+# to a JSONL or CSV file. Re-running with the same output skips images that are already in it.
+#
+#   python batch_classify.py "../plantvillage dataset/color" results.jsonl --labels-from-folders
+#   python batch_classify.py field_walk_2024.zip results.csv
+import io
+import os
+import csv
+import sys
+import json
+import time
+import argparse
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from model_registry import default_model_path, default_backend, ModelRegistry
+from inference import decode_image, get_engine, max_batch_size
+from image_source import ImageSource
+
+
+working_dir = os.path.dirname(os.path.abspath(__file__))
+
+csv_fields = ["path", "prediction", "confidence", "label", "error"]
+
+
+# Appends results to a JSONL or CSV file, picked by the file extension
+class ResultWriter:
+    def __init__(self, path):
+        self.path = path
+        self.is_csv = path.lower().endswith(".csv")
+        # Drop a partial last line left by an interrupted run, so the next row starts on a line of its own
+        if os.path.exists(path) and os.path.getsize(path) != self.complete_length(path):
+            os.truncate(path, self.complete_length(path))
+        write_header = self.is_csv and (not os.path.exists(path) or os.path.getsize(path) == 0)
+        self._file = open(path, "a", newline="")
+        if self.is_csv:
+            self._csv = csv.DictWriter(self._file, fieldnames=csv_fields)
+            if write_header:
+                self._csv.writeheader()
+
+    # Function to get the size of the file up to and including its last newline
+    @staticmethod
+    def complete_length(path):
+        with open(path, "rb") as f:
+            data = f.read()
+        return data.rfind(b"\n") + 1
+
+    # Function to read back the rows already written, so a restarted run can skip them; a last line
+    # without its newline was cut off mid-write and does not count as done
+    @staticmethod
+    def existing_rows(path):
+        if not os.path.exists(path):
+            return []
+        with open(path, "rb") as f:
+            text = f.read(ResultWriter.complete_length(path)).decode("utf-8")
+        if path.lower().endswith(".csv"):
+            return list(csv.DictReader(io.StringIO(text, newline="")))
+        return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+    def write(self, rows):
+        for row in rows:
+            if self.is_csv:
+                self._csv.writerow(row)
+            else:
+                self._file.write(json.dumps(row) + "\n")
+        # Flush per batch so an interrupted run loses at most one batch
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+# Function to decode one image on a worker thread; returns (name, array or None, error)
+def load(source, name):
+    try:
+        img_array, _ = decode_image(source.open(name))
+        return name, img_array, None
+    except Exception as e:
+        return name, None, str(e)
+
+
+def classify(source, engine, class_indices, writer, done, batch_size, workers, prefetch, labels_from_folders,
+             progress_every=1000):
+    batch = np.empty((batch_size, 224, 224, 3), dtype='float32')
+    batch_names = []
+    counts = {"images": 0, "errors": 0}
+    start = time.perf_counter()
+
+    def label_of(name):
+        return name.split("/")[-2] if labels_from_folders and "/" in name else None
+
+    def flush():
+        if not batch_names:
+            return
+        probabilities = engine.predict_proba(batch[:len(batch_names)])
+        rows = []
+        for name, row in zip(batch_names, probabilities):
+            index = int(np.argmax(row))
+            rows.append({"path": name, "prediction": class_indices[str(index)], "confidence": float(row[index]),
+                         "label": label_of(name), "error": None})
+        writer.write(rows)
+        previous = counts["images"]
+        counts["images"] += len(rows)
+        batch_names.clear()
+        if counts["images"] // progress_every != previous // progress_every:
+            elapsed = time.perf_counter() - start
+            print(f"{counts['images']} images, {counts['images'] / elapsed:.1f} images/sec", file=sys.stderr)
+
+    def take(future):
+        name, img_array, error = future.result()
+        if error is not None:
+            writer.write([{"path": name, "prediction": None, "confidence": None, "label": label_of(name),
+                           "error": error}])
+            counts["errors"] += 1
+            return
+        batch[len(batch_names)] = img_array
+        batch_names.append(name)
+        if len(batch_names) == batch_size:
+            flush()
+
+    # Decoding runs ahead of inference on a thread pool, but never more than prefetch images ahead,
+    # so memory stays bounded however many files the input holds
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for name in source.names():
+            if name in done:
+                continue
+            pending.append(pool.submit(load, source, name))
+            if len(pending) >= prefetch:
+                take(pending.popleft())
+        while pending:
+            take(pending.popleft())
+        flush()
+
+    counts["seconds"] = time.perf_counter() - start
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Classify every image in a directory tree or zip archive")
+    parser.add_argument("input", help="directory tree or zip archive of images")
+    parser.add_argument("output", help="results file, .jsonl or .csv; existing rows are skipped on restart")
+    parser.add_argument("--model", default=default_model_path)
+    parser.add_argument("--backend", default=default_backend)
+    parser.add_argument("--batch-size", type=int, default=max_batch_size)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--prefetch", type=int, default=None, help="images decoded ahead of inference")
+    parser.add_argument("--labels-from-folders", action="store_true",
+                        help="treat each image's folder name as its class and report accuracy")
+    args = parser.parse_args()
+
+    with open(f"{working_dir}/class_indices.json") as f:
+        class_indices = json.load(f)
+    engine = get_engine(ModelRegistry(args.model, backend=args.backend).get_model())
+
+    existing = ResultWriter.existing_rows(args.output)
+    done = {row["path"] for row in existing}
+    if done:
+        print(f"skipping {len(done)} images already in {args.output}", file=sys.stderr)
+
+    writer = ResultWriter(args.output)
+    try:
+        counts = classify(ImageSource(args.input), engine, class_indices, writer, done, args.batch_size,
+                          args.workers, args.prefetch or 4 * args.batch_size, args.labels_from_folders)
+    finally:
+        writer.close()
+
+    print(f"classified {counts['images']} images ({counts['errors']} failed) in {counts['seconds']:.1f}s, "
+          f"{counts['images'] / max(counts['seconds'], 1e-9):.1f} images/sec")
+    if args.labels_from_folders:
+        # Accuracy covers the whole output file, including rows from earlier runs
+        rows = [row for row in ResultWriter.existing_rows(args.output) if row.get("label") and row.get("prediction")]
+        if rows:
+            correct = sum(row["prediction"] == row["label"] for row in rows)
+            print(f"accuracy: {correct / len(rows):.4f} on {len(rows)} labeled images")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+import time
+import queue
+import threading
+import logging
+from concurrent.futures import Future
+
+import numpy as np
+
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFullError(Exception):
+    pass
+
+
+# Merges concurrent single-image requests into one forward pass. A batch is dispatched as soon
+# as it holds max_batch_size images or the oldest request has waited max_wait_ms.
+class MicroBatcher:
+    def __init__(self, predict_fn, max_batch_size=32, max_wait_ms=5, max_queue_size=1024):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._thread = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._thread.start()
+
+    # Queue one preprocessed image of shape (224, 224, 3); the future resolves to its probability vector
+    def submit(self, image):
+        future = Future()
+        try:
+            self._queue.put_nowait((image, future))
+        except queue.Full:
+            raise QueueFullError("inference queue is full")
+        return future
+
+    def queue_depth(self):
+        return self._queue.qsize()
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+
+    def _collect(self):
+        first = self._queue.get()
+        if first is None:
+            return None
+        items = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(items) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                # Finish this batch first, then stop
+                self._queue.put(None)
+                break
+            items.append(item)
+        return items
+
+    def _run(self):
+        while True:
+            items = self._collect()
+            if items is None:
+                return
+            try:
+                probabilities = self.predict_fn(np.stack([image for image, _ in items]))
+            except Exception as e:
+                logger.exception("Batched prediction failed")
+                for _, future in items:
+                    future.set_exception(e)
+                continue
+            for (_, future), row in zip(items, probabilities):
+                future.set_result(row)
@@ -0,0 +1,123 @@
+# Converts the trained Keras model to TFLite (fp32, dynamic-range and full-int8) and writes a
+# report comparing each variant with the Keras model
+#
+#   python convert_tflite.py --dataset "../plantvillage dataset/color"
+import os
+import json
+import time
+import random
+import argparse
+
+import numpy as np
+import tensorflow as tf
+
+from model_registry import default_model_path
+from inference import InferenceEngine, load_and_preprocess_images
+from tflite_backend import TFLiteEngine, model_path_for_backend
+
+
+image_extensions = (".jpg", ".jpeg", ".png")
+
+
+# Function to pick a class-balanced sample of images from the PlantVillage folder layout,
+# returning separate calibration and evaluation lists
+def sample_dataset_images(dataset_dir, calibration_per_class, evaluation_per_class, seed=0):
+    rng = random.Random(seed)
+    calibration, evaluation = [], []
+    for class_name in sorted(os.listdir(dataset_dir)):
+        class_dir = os.path.join(dataset_dir, class_name)
+        if not os.path.isdir(class_dir):
+            continue
+        files = sorted(f for f in os.listdir(class_dir) if f.lower().endswith(image_extensions))
+        rng.shuffle(files)
+        calibration += [os.path.join(class_dir, f) for f in files[:calibration_per_class]]
+        evaluation += [os.path.join(class_dir, f)
+                       for f in files[calibration_per_class:calibration_per_class + evaluation_per_class]]
+    return calibration, evaluation
+
+
+# Function to convert the Keras model; quantization is None, "dynamic" or "int8"
+def convert(model, quantization=None, calibration_images=None):
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    if quantization:
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if quantization == "int8":
+        def representative_dataset():
+            for image_path in calibration_images:
+                yield [load_and_preprocess_images([image_path])]
+
+        converter.representative_dataset = representative_dataset
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+        converter.inference_input_type = tf.int8
+        converter.inference_output_type = tf.int8
+    return converter.convert()
+
+
+# Function to measure one backend: size, cold load, per-image latency and its predictions
+def measure(name, model_path, load, images):
+    start = time.perf_counter()
+    engine = load()
+    engine.predict_proba(images[:1])
+    cold_load_seconds = time.perf_counter() - start
+
+    latencies, predictions = [], []
+    for i in range(len(images)):
+        start = time.perf_counter()
+        probabilities = engine.predict_proba(images[i:i + 1])
+        latencies.append(time.perf_counter() - start)
+        predictions.append(int(np.argmax(probabilities[0])))
+    return {
+        "backend": name,
+        "model_path": model_path,
+        "file_size_mb": os.path.getsize(model_path) / 2 ** 20,
+        "cold_load_seconds": cold_load_seconds,
+        "mean_latency_ms": float(np.mean(latencies) * 1000),
+        "p95_latency_ms": float(np.percentile(latencies, 95) * 1000),
+    }, np.array(predictions)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert the trained model to TFLite and compare the variants")
+    parser.add_argument("--model", default=default_model_path)
+    parser.add_argument("--dataset", required=True, help='PlantVillage class folders, e.g. "plantvillage dataset/color"')
+    parser.add_argument("--calibration-per-class", type=int, default=10)
+    parser.add_argument("--evaluation-per-class", type=int, default=10)
+    parser.add_argument("--num-threads", type=int, default=None)
+    parser.add_argument("--report", default=None, help="where to write the JSON report")
+    args = parser.parse_args()
+
+    calibration_images, evaluation_images = sample_dataset_images(
+        args.dataset, args.calibration_per_class, args.evaluation_per_class)
+    model = tf.keras.models.load_model(args.model)
+
+    for backend, quantization in (("tflite-fp32", None), ("tflite-dynamic", "dynamic"), ("tflite-int8", "int8")):
+        output_path = model_path_for_backend(backend, args.model)
+        with open(output_path, "wb") as f:
+            f.write(convert(model, quantization, calibration_images))
+        print(f"wrote {output_path}")
+
+    images = load_and_preprocess_images(evaluation_images)
+    reference, keras_predictions = measure("keras", args.model,
+                                           lambda: InferenceEngine(tf.keras.models.load_model(args.model)), images)
+    rows = [reference]
+    for backend in ("tflite-fp32", "tflite-dynamic", "tflite-int8"):
+        path = model_path_for_backend(backend, args.model)
+        row, predictions = measure(backend, path, lambda: TFLiteEngine(path, num_threads=args.num_threads), images)
+        row["top1_agreement"] = float(np.mean(predictions == keras_predictions))
+        rows.append(row)
+    reference["top1_agreement"] = 1.0
+
+    print(f"\n{'backend':<16}{'size MB':>10}{'cold load s':>13}{'mean ms':>10}{'p95 ms':>10}{'agreement':>11}")
+    for row in rows:
+        print(f"{row['backend']:<16}{row['file_size_mb']:>10.1f}{row['cold_load_seconds']:>13.2f}"
+              f"{row['mean_latency_ms']:>10.2f}{row['p95_latency_ms']:>10.2f}{row['top1_agreement']:>11.3f}")
+
+    report_path = args.report or os.path.join(os.path.dirname(args.model), "tflite_report.json")
+    with open(report_path, "w") as f:
+        json.dump({"evaluation_images": len(evaluation_images), "calibration_images": len(calibration_images),
+                   "backends": rows}, f, indent=2)
+    print(f"\nreport written to {report_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+import os
+import json
+
+import streamlit as st
+
+
+working_dir = os.path.dirname(os.path.abspath(__file__))
+disease_info_path = f"{working_dir}/disease_info.json"
+
+
+# Function to load the disease descriptions and treatments, keyed by the labels in class_indices.json
+def load_disease_info(path=disease_info_path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+# Function to check that every class the model can predict has an entry
+def validate_disease_info(disease_info, class_indices):
+    missing = [name for name in class_indices.values() if name not in disease_info]
+    if missing:
+        raise ValueError(f"{disease_info_path} has no entry for: {', '.join(missing)}")
+
+
+# Function to show additional information about the predicted class
+def show_disease_info(prediction, disease_info):
+    entry = disease_info.get(prediction)
+    if entry is None:
+        return
+    for section in entry["sections"]:
+        st.subheader(section["heading"])
+        for paragraph in section["body"]:
+            st.write(paragraph)
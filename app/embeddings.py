@@ -0,0 +1,216 @@
+# Exports the model's penultimate Dense(256) activations for the labeled PlantVillage images into a
+# float16 matrix on disk, and looks up the nearest reference images for a query.
+#
+#   python embeddings.py export "../plantvillage dataset/color" --coarse 256
+#   python embeddings.py search ../test_images/test_apple_black_rot.JPG --k 5
+import os
+import json
+import time
+import argparse
+from collections import defaultdict
+
+import numpy as np
+
+
+working_dir = os.path.dirname(os.path.abspath(__file__))
+default_index_dir = f"{working_dir}/trained_model/embeddings"
+
+
+def normalize(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    return vectors / np.maximum(np.linalg.norm(vectors, axis=-1, keepdims=True), 1e-12)
+
+
+# Nearest-neighbour lookup over the exported embeddings by cosine similarity. The matrix stays
+# memory-mapped as float16; the exact search converts it to float32 one bounded chunk at a time, since
+# numpy has no fast float16 matmul. With float32_cache the converted matrix is kept in RAM instead,
+# which is several times faster per query at twice the file size in memory. With a coarse quantizer
+# built, only the rows in the nprobe closest clusters are scanned.
+class EmbeddingIndex:
+    def __init__(self, index_dir=default_index_dir, float32_cache=False):
+        self.index_dir = index_dir
+        self.float32_cache = float32_cache
+        with open(os.path.join(index_dir, "index.json")) as f:
+            self.meta = json.load(f)
+        self.embeddings = np.load(os.path.join(index_dir, "embeddings.npy"), mmap_mode="r")
+        self.labels = np.load(os.path.join(index_dir, "labels.npy"), mmap_mode="r")
+        self._chunks = None
+        self.centroids = self.order = self.offsets = None
+        if os.path.exists(os.path.join(index_dir, "centroids.npy")):
+            self.centroids = np.load(os.path.join(index_dir, "centroids.npy"))
+            self.order = np.load(os.path.join(index_dir, "ivf_order.npy"), mmap_mode="r")
+            self.offsets = np.load(os.path.join(index_dir, "ivf_offsets.npy"))
+
+    def __len__(self):
+        return len(self.embeddings)
+
+    # Returns, per query, the k most similar reference images as dicts with file, label and similarity
+    def search(self, queries, k=5, nprobe=None, chunk_size=8192):
+        queries = normalize(np.atleast_2d(queries))
+        if self.centroids is not None and nprobe:
+            return [self._search_coarse(query, k, nprobe) for query in queries]
+
+        if self.float32_cache and self._chunks is None:
+            self._chunks = [(start, np.ascontiguousarray(self.embeddings[start:start + chunk_size], dtype=np.float32))
+                            for start in range(0, len(self.embeddings), chunk_size)]
+        best_scores = np.full((len(queries), 0), -np.inf, dtype=np.float32)
+        best_ids = np.zeros((len(queries), 0), dtype=np.int64)
+        for start, chunk in self._chunks or self._converted_chunks(chunk_size):
+            scores = queries @ chunk.T
+            ids = np.broadcast_to(np.arange(start, start + scores.shape[1]), scores.shape)
+            best_scores, best_ids = self._top_k(np.hstack([best_scores, scores]), np.hstack([best_ids, ids]), k)
+        return [self._results(ids, scores) for ids, scores in zip(best_ids, best_scores)]
+
+    # Yields (start, float32 chunk) pairs, converting into one reused buffer of chunk_size rows
+    def _converted_chunks(self, chunk_size):
+        buffer = np.empty((min(chunk_size, len(self.embeddings)), self.embeddings.shape[1]), dtype=np.float32)
+        for start in range(0, len(self.embeddings), chunk_size):
+            chunk = buffer[:len(self.embeddings[start:start + chunk_size])]
+            chunk[...] = self.embeddings[start:start + chunk_size]
+            yield start, chunk
+
+    def _search_coarse(self, query, k, nprobe):
+        clusters = np.argsort(-(self.centroids @ query))[:nprobe]
+        rows = np.sort(np.concatenate([self.order[self.offsets[c]:self.offsets[c + 1]] for c in clusters]))
+        scores = self.embeddings[rows].astype(np.float32) @ query
+        best_scores, best_ids = self._top_k(scores[None], rows[None], k)
+        return self._results(best_ids[0], best_scores[0])
+
+    @staticmethod
+    def _top_k(scores, ids, k):
+        k = min(k, scores.shape[1])
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k] if k else np.zeros((len(scores), 0), dtype=np.int64)
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        return np.take_along_axis(top_scores, order, axis=1), np.take_along_axis(np.take_along_axis(ids, top, axis=1),
+                                                                                order, axis=1)
+
+    def _results(self, ids, scores):
+        return [{"file": self.meta["files"][i], "label": self.meta["class_indices"][str(int(self.labels[i]))],
+                 "similarity": float(score)} for i, score in zip(ids, scores)]
+
+    # Function to build the coarse quantizer: k-means centroids on a sample, then every row is
+    # assigned to its closest centroid and the rows are stored grouped by cluster
+    def build_coarse(self, nlist=256, iterations=10, sample_size=50000, seed=0, chunk_size=65536):
+        rng = np.random.default_rng(seed)
+        sample_ids = np.sort(rng.choice(len(self.embeddings), min(sample_size, len(self.embeddings)), replace=False))
+        sample = self.embeddings[sample_ids].astype(np.float32)
+        centroids = sample[rng.choice(len(sample), min(nlist, len(sample)), replace=False)]
+        for _ in range(iterations):
+            assignment = np.argmax(sample @ centroids.T, axis=1)
+            for c in range(len(centroids)):
+                members = sample[assignment == c]
+                if len(members):
+                    centroids[c] = members.mean(axis=0)
+            centroids = normalize(centroids)
+
+        assignment = np.concatenate([np.argmax(self.embeddings[start:start + chunk_size].astype(np.float32) @ centroids.T,
+                                               axis=1) for start in range(0, len(self.embeddings), chunk_size)])
+        order = np.argsort(assignment, kind="stable")
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(assignment, minlength=len(centroids)))])
+        np.save(os.path.join(self.index_dir, "centroids.npy"), centroids)
+        np.save(os.path.join(self.index_dir, "ivf_order.npy"), order)
+        np.save(os.path.join(self.index_dir, "ivf_offsets.npy"), offsets)
+        self.centroids, self.order, self.offsets = centroids, order, offsets
+
+
+# Function to list the labeled reference images in a directory tree or zip archive, skipping the first
+# validation_split of each class folder so only the training part of the 80/20 split is indexed
+def reference_images(source, class_indices, validation_split=0.2):
+    labels = {name: int(index) for index, name in class_indices.items()}
+    by_class = defaultdict(list)
+    for name in source.names():
+        folder = name.split("/")[-2] if "/" in name else None
+        if folder in labels:
+            by_class[folder].append(name)
+    names, name_labels = [], []
+    for folder in sorted(by_class):
+        files = sorted(by_class[folder])
+        kept = files[int(validation_split * len(files)):]
+        names += kept
+        name_labels += [labels[folder]] * len(kept)
+    return names, name_labels
+
+
+# Function to write embeddings.npy (float16, L2-normalized), labels.npy and index.json
+def export(model, model_fingerprint, source, class_indices, output_dir, batch_size=32, validation_split=0.2):
+    from inference import get_engine, load_and_preprocess_images
+
+    names, labels = reference_images(source, class_indices, validation_split)
+    os.makedirs(output_dir, exist_ok=True)
+    engine = get_engine(model)
+    embeddings = None
+    start_time = time.perf_counter()
+    for start in range(0, len(names), batch_size):
+        batch = load_and_preprocess_images([source.open(name) for name in names[start:start + batch_size]])
+        _, batch_embeddings = engine.predict_with_embeddings(batch)
+        if embeddings is None:
+            embeddings = np.lib.format.open_memmap(os.path.join(output_dir, "embeddings.npy"), mode="w+",
+                                                   dtype=np.float16, shape=(len(names), batch_embeddings.shape[1]))
+        embeddings[start:start + len(batch)] = normalize(batch_embeddings)
+        done = start + len(batch)
+        if done % (batch_size * 100) < batch_size or done == len(names):
+            print(f"{done}/{len(names)} images, {done / (time.perf_counter() - start_time):.1f} images/sec")
+    if embeddings is not None:
+        embeddings.flush()
+    np.save(os.path.join(output_dir, "labels.npy"), np.array(labels, dtype=np.int16))
+    with open(os.path.join(output_dir, "index.json"), "w") as f:
+        json.dump({"model_fingerprint": model_fingerprint, "source": os.path.abspath(source.root),
+                   "class_indices": class_indices, "files": names}, f)
+    return len(names)
+
+
+def main():
+    from model_registry import default_model_path, ModelRegistry
+    from image_source import ImageSource
+
+    parser = argparse.ArgumentParser(description="Export and search reference image embeddings")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export", help="embed the labeled reference images")
+    export_parser.add_argument("input", help='PlantVillage class folders or a zip of them, e.g. "plantvillage dataset/color"')
+    export_parser.add_argument("--output", default=default_index_dir)
+    export_parser.add_argument("--model", default=default_model_path)
+    export_parser.add_argument("--batch-size", type=int, default=32)
+    export_parser.add_argument("--validation-split", type=float, default=0.2,
+                               help="fraction of each class left out, matching the training split")
+    export_parser.add_argument("--coarse", type=int, default=0, metavar="NLIST",
+                               help="also build a coarse quantizer with this many clusters")
+
+    search_parser = subparsers.add_parser("search", help="nearest reference images for an image")
+    search_parser.add_argument("image")
+    search_parser.add_argument("--index", default=default_index_dir)
+    search_parser.add_argument("--model", default=default_model_path)
+    search_parser.add_argument("--k", type=int, default=5)
+    search_parser.add_argument("--nprobe", type=int, default=None, help="clusters to scan with the coarse quantizer")
+
+    args = parser.parse_args()
+    with open(f"{working_dir}/class_indices.json") as f:
+        class_indices = json.load(f)
+    registry = ModelRegistry(args.model)
+    model = registry.get_model()
+
+    if args.command == "export":
+        count = export(model, registry.fingerprint, ImageSource(args.input), class_indices, args.output,
+                       args.batch_size, args.validation_split)
+        print(f"wrote {count} embeddings to {args.output}")
+        if args.coarse:
+            EmbeddingIndex(args.output).build_coarse(args.coarse)
+            print(f"built coarse quantizer with {args.coarse} clusters")
+        return
+
+    from inference import predict_image_classes_with_embeddings
+
+    index = EmbeddingIndex(args.index)
+    predictions, embeddings = predict_image_classes_with_embeddings(model, [args.image], class_indices)
+    start = time.perf_counter()
+    neighbours = index.search(embeddings, args.k, args.nprobe)[0]
+    elapsed = time.perf_counter() - start
+    print(f"prediction: {predictions[0]}")
+    for neighbour in neighbours:
+        print(f"{neighbour['similarity']:.3f}  {neighbour['label']:<50}{neighbour['file']}")
+    print(f"lookup over {len(index)} embeddings took {elapsed * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import metrics
+from inference import configure_threads
+
+
+class BusyError(Exception):
+    pass
+
+
+# Runs predictions for every session on a fixed number of workers. At most workers + max_queue_size
+# calls are admitted at once; beyond that submit raises BusyError instead of piling up more work.
+class InferenceExecutor:
+    def __init__(self, workers=1, max_queue_size=8):
+        self.workers = workers
+        self.max_queue_size = max_queue_size
+        # The intra-op pool is one pool for the whole process, shared by every concurrent forward pass, so
+        # it keeps all the cores; concurrency is bounded by the worker count and the inter-op pool instead
+        configure_threads(intra_op_threads=os.cpu_count() or 1, inter_op_threads=workers)
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="inference")
+        self._slots = threading.BoundedSemaphore(workers + max_queue_size)
+        self._lock = threading.Lock()
+        self._admitted = 0
+        self._running = 0
+        self._waits = 0
+        self._total_wait = 0.
+
+    def submit(self, fn, *args, **kwargs):
+        if not self._slots.acquire(blocking=False):
+            raise BusyError("all inference workers are busy and the queue is full")
+        with self._lock:
+            self._admitted += 1
+        submitted = time.perf_counter()
+        # Stages timed on the worker (e.g. predict) still belong to the submitting session's request
+        record = metrics.current_request()
+
+        def run():
+            with self._lock:
+                self._running += 1
+                self._waits += 1
+                self._total_wait += time.perf_counter() - submitted
+            try:
+                with metrics.bind_request(record):
+                    return fn(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self._running -= 1
+                    self._admitted -= 1
+                self._slots.release()
+
+        try:
+            return self._pool.submit(run)
+        except Exception:
+            with self._lock:
+                self._admitted -= 1
+            self._slots.release()
+            raise
+
+    # Calls admitted but not started yet
+    def queue_depth(self):
+        with self._lock:
+            return self._admitted - self._running
+
+    def stats(self):
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "running": self._running,
+                "queued": self._admitted - self._running,
+                "mean_wait_ms": self._total_wait / self._waits * 1000 if self._waits else 0.,
+            }
+
+
+# Function to build the executor from PLANT_INFERENCE_WORKERS / PLANT_INFERENCE_QUEUE
+def executor_from_env():
+    return InferenceExecutor(workers=int(os.environ.get("PLANT_INFERENCE_WORKERS", 1)),
+                             max_queue_size=int(os.environ.get("PLANT_INFERENCE_QUEUE", 8)))
@@ -0,0 +1,36 @@
+import io
+import os
+import zipfile
+import threading
+
+
+image_extensions = (".jpg", ".jpeg", ".png")
+
+
+# Reads images from a directory tree or a zip archive, naming each by its path relative to the root
+class ImageSource:
+    def __init__(self, root):
+        self.root = root
+        self._zip = zipfile.ZipFile(root) if zipfile.is_zipfile(root) else None
+        self._local = threading.local()
+
+    def names(self):
+        if self._zip is not None:
+            for info in self._zip.infolist():
+                if not info.is_dir() and info.filename.lower().endswith(image_extensions):
+                    yield info.filename
+            return
+        for directory, subdirectories, files in os.walk(self.root):
+            subdirectories.sort()
+            for file in sorted(files):
+                if file.lower().endswith(image_extensions):
+                    yield os.path.relpath(os.path.join(directory, file), self.root).replace(os.sep, "/")
+
+    def open(self, name):
+        if self._zip is None:
+            return os.path.join(self.root, name)
+        # One handle per worker thread so reads of different members do not contend
+        archive = getattr(self._local, "zip", None)
+        if archive is None:
+            archive = self._local.zip = zipfile.ZipFile(self.root)
+        return io.BytesIO(archive.read(name))
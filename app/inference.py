@@ -0,0 +1,234 @@
+import io
+import os
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+import numpy as np
+import tensorflow as tf
+
+import metrics
+from prediction_cache import PredictionCache, read_image_bytes
+
+
+logger = logging.getLogger(__name__)
+
+input_shape = (224, 224, 3)
+
+# Upper bound on images per forward pass, which keeps the input array at ~19 MB
+max_batch_size = int(os.environ.get("PLANT_MAX_BATCH_SIZE", 32))
+
+
+# Function to set the TF thread pools; this only works before TF has run its first op
+def configure_threads(intra_op_threads=None, inter_op_threads=None):
+    try:
+        if intra_op_threads:
+            tf.config.threading.set_intra_op_parallelism_threads(intra_op_threads)
+        if inter_op_threads:
+            tf.config.threading.set_inter_op_parallelism_threads(inter_op_threads)
+    except RuntimeError:
+        logger.warning("TensorFlow is already initialized, keeping the existing thread pool sizes")
+
+
+# Function to apply PLANT_TF_INTRA_OP_THREADS / PLANT_TF_INTER_OP_THREADS; called by the model registry
+# before the first model is loaded, since loading it initializes TF
+def configure_threads_from_env():
+    configure_threads(int(os.environ.get("PLANT_TF_INTRA_OP_THREADS", 0)),
+                      int(os.environ.get("PLANT_TF_INTER_OP_THREADS", 0)))
+
+
+# Runs the Keras model through a traced function with a fixed input signature, which skips
+# the data adapter and callback setup that model.predict pays for on every call
+class InferenceEngine:
+    def __init__(self, model, top_k=None):
+        self.model = model
+        self.top_k = top_k
+        self._forward = tf.function(
+            self._call_model,
+            input_signature=[tf.TensorSpec(shape=(None,) + input_shape, dtype=tf.float32)],
+        )
+        self._forward_with_embeddings = None
+
+    def _call_model(self, images):
+        return self.model(images, training=False)
+
+    # Full probability vectors, shape (N, num_classes)
+    def predict_proba(self, images):
+        images = np.asarray(images, dtype=np.float32)
+        with metrics.timed("predict"):
+            return self._forward(tf.convert_to_tensor(images)).numpy()
+
+    # Top-k class indices and their probabilities, both shape (N, k), highest first
+    def predict_top_k(self, images, k):
+        probabilities = self.predict_proba(images)
+        k = min(k, probabilities.shape[1])
+        top = np.argpartition(-probabilities, k - 1, axis=1)[:, :k]
+        top_probabilities = np.take_along_axis(probabilities, top, axis=1)
+        order = np.argsort(-top_probabilities, axis=1)
+        return np.take_along_axis(top, order, axis=1), np.take_along_axis(top_probabilities, order, axis=1)
+
+    # Probability vectors and the penultimate Dense(256) activations from the same forward pass,
+    # shapes (N, num_classes) and (N, 256)
+    def predict_with_embeddings(self, images):
+        if self._forward_with_embeddings is None:
+            dense_layers = [layer for layer in self.model.layers if isinstance(layer, tf.keras.layers.Dense)]
+            two_outputs = tf.keras.Model(self.model.inputs, [self.model.output, dense_layers[-2].output])
+            self._forward_with_embeddings = tf.function(
+                lambda batch: two_outputs(batch, training=False),
+                input_signature=[tf.TensorSpec(shape=(None,) + input_shape, dtype=tf.float32)],
+            )
+        images = np.asarray(images, dtype=np.float32)
+        with metrics.timed("predict"):
+            probabilities, embeddings = self._forward_with_embeddings(tf.convert_to_tensor(images))
+        return probabilities.numpy(), embeddings.numpy()
+
+    # Returns the full vector or only the top-k, depending on how the engine was configured
+    def predict(self, images, top_k=None):
+        top_k = top_k or self.top_k
+        if top_k:
+            return self.predict_top_k(images, top_k)
+        return self.predict_proba(images)
+
+
+# Function to get the engine for a model, building it once per model instance. The engine is stored on
+# the model itself: it refers back to the model, so a model -> engine cache keyed on the model (even a
+# weak one) would keep every reloaded model alive, while this cycle is freed with the model.
+def get_engine(model):
+    # Anything that is not a Keras model is already an engine, e.g. a TFLiteEngine
+    if not isinstance(model, tf.keras.Model):
+        return model
+    engine = getattr(model, "_inference_engine", None)
+    if engine is None:
+        engine = InferenceEngine(model)
+        model._inference_engine = engine
+    return engine
+
+
+# Function to decode an image once, using JPEG draft mode to skip most of the work on large photos.
+# Returns the model input as a (H, W, 3) float32 array in [0, 1] and, if requested, a preview image
+# resized from the same decoded buffer.
+def decode_image(image_path, target_size=(224, 224), preview_size=None):
+    with metrics.timed("decode"):
+        img = Image.open(image_path)
+        # Let libjpeg decode at 1/2, 1/4 or 1/8 scale while staying at least as large as every output;
+        # this is a no-op for other formats
+        needed = target_size if preview_size is None else tuple(map(max, target_size, preview_size))
+        img.draft('RGB', needed)
+        # RGBA, palette and grayscale images would otherwise give the wrong number of channels
+        img = img.convert('RGB')
+    with metrics.timed("resize"):
+        resized = img.resize(target_size)
+        preview = img.resize(preview_size) if preview_size is not None else None
+    with metrics.timed("scale"):
+        img_array = np.asarray(resized, dtype='float32') / 255.
+    return img_array, preview
+
+
+# Function to Load and Preprocess the Image using Pillow
+def load_and_preprocess_image(image_path, target_size=(224, 224)):
+    # Decode, resize and scale the image values to [0, 1]
+    img_array, _ = decode_image(image_path, target_size)
+    # Add batch dimension
+    return np.expand_dims(img_array, axis=0)
+
+
+# Function to Predict the Class of an Image
+def predict_image_class(model, image_path, class_indices):
+    preprocessed_img = load_and_preprocess_image(image_path)
+    predictions = get_engine(model).predict_proba(preprocessed_img)
+    predicted_class_index = np.argmax(predictions, axis=1)[0]
+    predicted_class_name = class_indices[str(predicted_class_index)]
+    metrics.count_prediction(predicted_class_name)
+    return predicted_class_name
+
+
+# Function to Load and Preprocess many Images in parallel into one preallocated batch
+def load_and_preprocess_images(image_paths, target_size=(224, 224), max_workers=None):
+    batch = np.empty((len(image_paths), target_size[1], target_size[0], 3), dtype='float32')
+
+    def fill(index, image_path):
+        batch[index], _ = decode_image(image_path, target_size)
+
+    # PIL releases the GIL while decoding and resizing, so threads run in parallel
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        list(pool.map(fill, range(len(image_paths)), image_paths))
+    return batch
+
+
+# Function to Predict the probability vectors of many Images, one forward pass per chunk of max_batch_size.
+# With a cache, only images whose bytes were not seen before with this model go through the network.
+# Arrays already produced by decode_image can be passed as decoded to skip decoding altogether.
+def predict_probabilities(model, image_paths, batch_size=None, cache=None, model_fingerprint=None, decoded=None):
+    batch_size = min(batch_size or max_batch_size, max_batch_size)
+    engine = get_engine(model)
+
+    sources = list(image_paths)
+    keys, results = None, [None] * len(sources)
+    if cache is not None:
+        image_bytes = [read_image_bytes(image_path) for image_path in sources]
+        keys = [PredictionCache.make_key(data, model_fingerprint) for data in image_bytes]
+        results = [cache.get(key) for key in keys]
+        sources = [io.BytesIO(data) for data in image_bytes]
+    missing = [i for i, result in enumerate(results) if result is None]
+
+    for start in range(0, len(missing), batch_size):
+        chunk = missing[start:start + batch_size]
+        if decoded is not None:
+            batch = np.stack([decoded[i] for i in chunk])
+        else:
+            batch = load_and_preprocess_images([sources[i] for i in chunk])
+        for i, row in zip(chunk, engine.predict_proba(batch)):
+            results[i] = row
+        if cache is not None:
+            cache.put_many([(keys[i], results[i]) for i in chunk])
+    return np.stack(results) if results else np.empty((0, 0), dtype='float32')
+
+
+# Function to Predict the Classes of many Images
+def predict_image_classes(model, image_paths, class_indices, batch_size=None, cache=None, model_fingerprint=None,
+                          decoded=None):
+    if not image_paths:
+        return []
+    predictions = predict_probabilities(model, image_paths, batch_size, cache, model_fingerprint, decoded)
+    predicted_class_names = [class_indices[str(index)] for index in np.argmax(predictions, axis=1)]
+    for predicted_class_name in predicted_class_names:
+        metrics.count_prediction(predicted_class_name)
+    return predicted_class_names
+
+
+# Function to Predict the Classes and the embeddings of many Images in one forward pass per chunk. With a
+# cache, each image's probabilities and embedding are stored together, under a key of their own so they
+# never mix with the plain probability vectors of predict_probabilities.
+def predict_image_classes_with_embeddings(model, image_paths, class_indices, batch_size=None, cache=None,
+                                          model_fingerprint=None, decoded=None):
+    batch_size = min(batch_size or max_batch_size, max_batch_size)
+    engine = get_engine(model)
+
+    sources = list(image_paths)
+    keys, results = None, [None] * len(sources)
+    if cache is not None:
+        image_bytes = [read_image_bytes(image_path) for image_path in sources]
+        keys = [PredictionCache.make_key(data, f"{model_fingerprint}:embeddings") for data in image_bytes]
+        results = [cache.get(key) for key in keys]
+        sources = [io.BytesIO(data) for data in image_bytes]
+    missing = [i for i, result in enumerate(results) if result is None]
+
+    for start in range(0, len(missing), batch_size):
+        chunk = missing[start:start + batch_size]
+        if decoded is not None:
+            batch = np.stack([decoded[i] for i in chunk])
+        else:
+            batch = load_and_preprocess_images([sources[i] for i in chunk])
+        probabilities, chunk_embeddings = engine.predict_with_embeddings(batch)
+        for i, row in zip(chunk, np.hstack([probabilities, chunk_embeddings])):
+            results[i] = row
+        if cache is not None:
+            cache.put_many([(keys[i], results[i]) for i in chunk])
+
+    if not results:
+        return [], np.empty((0, 0), dtype='float32')
+    results = np.stack(results)
+    predicted_class_names = [class_indices[str(index)] for index in np.argmax(results[:, :len(class_indices)], axis=1)]
+    for predicted_class_name in predicted_class_names:
+        metrics.count_prediction(predicted_class_name)
+    return predicted_class_names, results[:, len(class_indices):]
@@ -0,0 +1,209 @@
+# Per-stage latency histograms, prediction/error counters and memory gauges, exported in the
+# Prometheus text format. Everything is a no-op unless PLANT_METRICS=1 or PLANT_METRICS_PORT is set.
+import os
+import sys
+import json
+import time
+import logging
+import resource
+import threading
+from contextlib import contextmanager, nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+logger = logging.getLogger(__name__)
+
+enabled = os.environ.get("PLANT_METRICS") == "1" or bool(os.environ.get("PLANT_METRICS_PORT"))
+log_requests = os.environ.get("PLANT_METRICS_LOG") == "1"
+
+# Seconds; covers a fast resize (~0.1 ms) up to a cold forward pass
+default_buckets = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1., 2.5, 5.)
+
+
+class Histogram:
+    def __init__(self, buckets=default_buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.
+        self.count = 0
+
+    def observe(self, value):
+        index = 0
+        while index < len(self.buckets) and value > self.buckets[index]:
+            index += 1
+        self.counts[index] += 1
+        self.sum += value
+        self.count += 1
+
+
+_lock = threading.Lock()
+_stage_seconds = {}
+_predictions = {}
+_errors = {}
+_local = threading.local()
+_null = nullcontext()
+
+
+# Function to time one stage of the hot path, e.g. `with timed("resize"):`
+def timed(stage):
+    if not enabled:
+        return _null
+    return _timed(stage)
+
+
+@contextmanager
+def _timed(stage):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        with _lock:
+            histogram = _stage_seconds.get(stage)
+            if histogram is None:
+                histogram = _stage_seconds[stage] = Histogram()
+            histogram.observe(elapsed)
+        record = getattr(_local, "record", None)
+        if record is not None:
+            record[stage] = record.get(stage, 0.) + elapsed
+
+
+# Function to group the stages of one request into a single structured log line
+def request(name):
+    if not (enabled and log_requests):
+        return _null
+    return _request(name)
+
+
+@contextmanager
+def _request(name):
+    _local.record = record = {}
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _local.record = None
+        logger.info(json.dumps({"request": name, "total_seconds": time.perf_counter() - start,
+                                "stages": record}))
+
+
+# Function to get the current thread's request record, to hand it to a worker thread with bind_request
+def current_request():
+    return getattr(_local, "record", None)
+
+
+# Function to make the stages timed in this thread count towards a request started in another thread
+@contextmanager
+def bind_request(record):
+    previous = getattr(_local, "record", None)
+    _local.record = record
+    try:
+        yield
+    finally:
+        _local.record = previous
+
+
+# Function to add a stage measured on another thread to this thread's request record only, e.g. the
+# forward pass of a micro-batch; the stage histogram already has it
+def record_stage(stage, seconds):
+    record = getattr(_local, "record", None)
+    if record is not None:
+        record[stage] = record.get(stage, 0.) + seconds
+
+
+def count_prediction(class_name, count=1):
+    if enabled:
+        with _lock:
+            _predictions[class_name] = _predictions.get(class_name, 0) + count
+
+
+def count_error(stage):
+    if enabled:
+        with _lock:
+            _errors[stage] = _errors.get(stage, 0) + 1
+
+
+def _resident_bytes():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+
+def _peak_resident_bytes():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"')
+
+
+# Function to render all metrics in the Prometheus text exposition format
+def render():
+    lines = []
+    with _lock:
+        lines += ["# HELP plant_stage_seconds Time spent in each stage of the inference path",
+                  "# TYPE plant_stage_seconds histogram"]
+        for stage, histogram in sorted(_stage_seconds.items()):
+            cumulative = 0
+            for bound, count in zip(histogram.buckets + (float("inf"),), histogram.counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'plant_stage_seconds_bucket{{stage="{stage}",le="{le}"}} {cumulative}')
+            lines.append(f'plant_stage_seconds_sum{{stage="{stage}"}} {histogram.sum}')
+            lines.append(f'plant_stage_seconds_count{{stage="{stage}"}} {histogram.count}')
+
+        lines += ["# HELP plant_predictions_total Predictions per class",
+                  "# TYPE plant_predictions_total counter"]
+        for class_name, count in sorted(_predictions.items()):
+            lines.append(f'plant_predictions_total{{class="{_escape(class_name)}"}} {count}')
+
+        lines += ["# HELP plant_errors_total Failures per stage", "# TYPE plant_errors_total counter"]
+        for stage, count in sorted(_errors.items()):
+            lines.append(f'plant_errors_total{{stage="{stage}"}} {count}')
+
+    resident = _resident_bytes()
+    if resident is not None:
+        lines += ["# HELP process_resident_memory_bytes Resident memory size in bytes",
+                  "# TYPE process_resident_memory_bytes gauge",
+                  f"process_resident_memory_bytes {resident}"]
+    lines += ["# HELP process_peak_resident_memory_bytes Peak resident memory size in bytes",
+              "# TYPE process_peak_resident_memory_bytes gauge",
+              f"process_peak_resident_memory_bytes {_peak_resident_bytes()}"]
+    return "\n".join(lines) + "\n"
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path != "/metrics":
+            self.send_error(404)
+            return
+        body = render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug(format, *args)
+
+
+_server = None
+
+
+# Function to serve /metrics on PLANT_METRICS_PORT from a background thread; safe to call repeatedly
+def start_exporter(port=None):
+    global _server
+    port = port or int(os.environ.get("PLANT_METRICS_PORT", 0))
+    if not enabled or not port:
+        return None
+    with _lock:
+        if _server is None:
+            _server = ThreadingHTTPServer(("0.0.0.0", port), MetricsHandler)
+            threading.Thread(target=_server.serve_forever, name="metrics-exporter", daemon=True).start()
+            logger.info("Serving metrics on port %d", port)
+    return _server
@@ -0,0 +1,131 @@
+import os
+import time
+import threading
+import logging
+
+import numpy as np
+import tensorflow as tf
+
+from inference import configure_threads_from_env, get_engine
+from prediction_cache import file_fingerprint
+from tflite_backend import TFLiteEngine, model_path_for_backend
+
+
+logger = logging.getLogger(__name__)
+
+working_dir = os.path.dirname(os.path.abspath(__file__))
+default_model_path = f"{working_dir}/trained_model/plant_disease_prediction_model.h5"
+default_backend = os.environ.get("PLANT_MODEL_BACKEND", "keras")
+
+
+# Keeps a single loaded model per process and shares it between all sessions.
+# For the TFLite backends the shared object is a TFLiteEngine instead of a Keras model.
+class ModelRegistry:
+    def __init__(self, model_path=default_model_path, input_shape=(224, 224, 3), warm_up=True, backend="keras"):
+        self.backend = backend
+        self.model_path = model_path_for_backend(backend, model_path)
+        self.input_shape = input_shape
+        self.warm_up = warm_up
+        self.load_seconds = None
+        self.warm_up_seconds = None
+        self.fingerprint = None
+        self._model = None
+        self._loaded = (None, None)
+        self._model_mtime = None
+        self._failed_mtime = None
+        self._lock = threading.Lock()
+
+    # Return the shared model, loading it on first use or when the file on disk changed. If a reload
+    # fails (e.g. the file is still being copied), the current model stays in use and that version of
+    # the file is not retried until it changes again.
+    def get_model(self):
+        if self._model is None or self._file_changed():
+            with self._lock:
+                if self._model is None:
+                    self._load(self.model_path)
+                elif self._file_changed():
+                    mtime = self._current_mtime()
+                    try:
+                        self._load(self.model_path)
+                    except Exception:
+                        logger.exception("Reloading %s failed, keeping the current model", self.model_path)
+                        self._failed_mtime = mtime
+        return self._model
+
+    # Like get_model, but also returns the fingerprint of that same model, read together so a swap in
+    # between cannot pair one model's output with the other's fingerprint
+    def get_model_and_fingerprint(self):
+        self.get_model()
+        return self._loaded
+
+    # Point the registry at another model file and load it right away
+    def swap(self, model_path):
+        with self._lock:
+            self._load(model_path)
+        return self._model
+
+    def stats(self):
+        return {
+            'backend': self.backend,
+            'model_path': self.model_path,
+            'loaded': self._model is not None,
+            'fingerprint': self.fingerprint,
+            'load_seconds': self.load_seconds,
+            'warm_up_seconds': self.warm_up_seconds,
+        }
+
+    def _current_mtime(self):
+        try:
+            return os.path.getmtime(self.model_path)
+        except OSError:
+            return None
+
+    def _file_changed(self):
+        mtime = self._current_mtime()
+        # Keep serving the model we already have if the file is being replaced or failed to load
+        return mtime is not None and mtime not in (self._model_mtime, self._failed_mtime)
+
+    def _load(self, model_path):
+        mtime = os.path.getmtime(model_path)
+        if self._model is None:
+            # Thread pool sizes can only be set before TF runs its first op, which load_model does
+            configure_threads_from_env()
+        start = time.perf_counter()
+        if self.backend == "keras":
+            model = tf.keras.models.load_model(model_path)
+        else:
+            model = TFLiteEngine(model_path, num_threads=int(os.environ.get("PLANT_TF_INTRA_OP_THREADS", 0)) or None)
+        load_seconds = time.perf_counter() - start
+        fingerprint = file_fingerprint(model_path)
+
+        warm_up_seconds = None
+        if self.warm_up:
+            # Run one dummy batch so graph tracing happens here and not on the first user request
+            start = time.perf_counter()
+            get_engine(model).predict_proba(np.zeros((1,) + tuple(self.input_shape), dtype='float32'))
+            warm_up_seconds = time.perf_counter() - start
+
+        # Only publish the new model once it is fully loaded and warmed up
+        self._model = model
+        self.model_path = model_path
+        self._model_mtime = mtime
+        self.fingerprint = fingerprint
+        self._loaded = (model, fingerprint)
+        self.load_seconds = load_seconds
+        self.warm_up_seconds = warm_up_seconds
+        logger.info("Loaded %s model %s in %.2fs (warm-up %s)", self.backend, model_path, load_seconds,
+                    f"{warm_up_seconds:.2f}s" if warm_up_seconds is not None else "skipped")
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+# Function to get the process-wide registry
+def get_registry(model_path=default_model_path, backend=default_backend):
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = ModelRegistry(model_path, backend=backend)
+    return _registry
@@ -0,0 +1,119 @@
+import os
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+# Function to fingerprint a model file by its content, so a retrained model never reuses old entries
+def file_fingerprint(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# Function to read the raw bytes of a path, an uploaded file or any file-like object
+def read_image_bytes(image):
+    if isinstance(image, bytes):
+        return image
+    if isinstance(image, (str, os.PathLike)):
+        with open(image, "rb") as f:
+            return f.read()
+    if hasattr(image, "getvalue"):
+        return image.getvalue()
+    image.seek(0)
+    data = image.read()
+    image.seek(0)
+    return data
+
+
+# Content-addressed cache of probability vectors: an in-memory LRU in front of an optional SQLite file.
+# The SQLite file is trimmed to its newest max_db_entries rows every 1% of max_db_entries writes, so it
+# holds at most about 1% more than that.
+class PredictionCache:
+    def __init__(self, max_entries=1024, db_path=None, max_db_entries=100000):
+        self.max_entries = max_entries
+        self.max_db_entries = max_db_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self._db_writes = 0
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            # WAL with synchronous=NORMAL makes a commit an append without an fsync per write
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute("CREATE TABLE IF NOT EXISTS predictions (key TEXT PRIMARY KEY, probabilities BLOB)")
+            self._db.commit()
+
+    # The key covers both the image bytes and the model, so a model change invalidates every entry
+    @staticmethod
+    def make_key(image_bytes, model_fingerprint):
+        return hashlib.sha256(model_fingerprint.encode() + b"\0" + image_bytes).hexdigest()
+
+    def get(self, key):
+        with self._lock:
+            probabilities = self._entries.get(key)
+            if probabilities is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return probabilities
+            if self._db is not None:
+                row = self._db.execute("SELECT probabilities FROM predictions WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    probabilities = np.frombuffer(row[0], dtype='float32')
+                    self._insert(key, probabilities)
+                    self.hits += 1
+                    return probabilities
+            self.misses += 1
+            return None
+
+    def put(self, key, probabilities):
+        self.put_many([(key, probabilities)])
+
+    # Function to store the (key, probabilities) pairs of a whole batch with one SQLite commit
+    def put_many(self, items):
+        items = [(key, np.asarray(probabilities, dtype='float32')) for key, probabilities in items]
+        with self._lock:
+            for key, probabilities in items:
+                self._insert(key, probabilities)
+            if self._db is not None:
+                self._db.executemany("INSERT OR REPLACE INTO predictions VALUES (?, ?)",
+                                     [(key, probabilities.tobytes()) for key, probabilities in items])
+                self._db_writes += len(items)
+                if self._db_writes >= max(1, self.max_db_entries // 100):
+                    # Rowids grow with every write, so this keeps the newest max_db_entries rows
+                    self._db.execute("DELETE FROM predictions WHERE rowid <= (SELECT MAX(rowid) FROM predictions) - ?",
+                                     (self.max_db_entries,))
+                    self._db_writes = 0
+                self._db.commit()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def _insert(self, key, probabilities):
+        self._entries[key] = probabilities
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+
+# Function to build the cache from PLANT_CACHE_SIZE / PLANT_CACHE_DB / PLANT_CACHE_DB_SIZE
+def cache_from_env():
+    return PredictionCache(max_entries=int(os.environ.get("PLANT_CACHE_SIZE", 1024)),
+                           db_path=os.environ.get("PLANT_CACHE_DB") or None,
+                           max_db_entries=int(os.environ.get("PLANT_CACHE_DB_SIZE", 100000)))
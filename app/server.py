@@ -0,0 +1,171 @@
+# Headless HTTP inference service
+#
+#   python server.py --port 8080
+#   curl --data-binary @../test_images/test_apple_black_rot.JPG http://localhost:8080/predict
+import io
+import os
+import json
+import time
+import logging
+import argparse
+from concurrent.futures import TimeoutError
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from model_registry import get_registry
+from inference import get_engine, load_and_preprocess_image
+from batching import MicroBatcher, QueueFullError
+from prediction_cache import PredictionCache, cache_from_env
+import metrics
+
+
+logger = logging.getLogger(__name__)
+
+working_dir = os.path.dirname(os.path.abspath(__file__))
+model_path = os.environ.get("PLANT_MODEL_PATH", f"{working_dir}/trained_model/plant_disease_prediction_model.h5")
+
+
+class PredictionHandler(BaseHTTPRequestHandler):
+    # Set by make_server
+    batcher = None
+    class_indices = None
+    cache = None
+    registry = None
+    request_timeout = 30.
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send_json(200, {"status": "ok", "queue_depth": self.batcher.queue_depth(),
+                                  "cache": self.cache.stats()})
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        if self.path != "/predict":
+            self._send_json(404, {"error": "not found"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+        except ValueError:
+            length = 0
+        # A missing, malformed or negative length is refused before reading, since rfile.read(-1) would
+        # block until the client closes the connection
+        if length <= 0:
+            self._send_json(400, {"error": "request body must contain the image bytes"})
+            return
+        body = self.rfile.read(length)
+        with metrics.request("http"):
+            self._handle_predict(body)
+
+    def _handle_predict(self, body):
+        # Retried or repeated uploads are answered from the cache without decoding. get_model is only an
+        # mtime check here, but it makes a swapped model file change the key before any cache lookup
+        self.registry.get_model()
+        cache_key = PredictionCache.make_key(body, self.registry.fingerprint)
+        probabilities = self.cache.get(cache_key)
+        if probabilities is None:
+            probabilities = self._predict(body)
+            if probabilities is None:
+                return
+
+        predicted_class_index = int(np.argmax(probabilities))
+        metrics.count_prediction(self.class_indices[str(predicted_class_index)])
+        self._send_json(200, {
+            "class": self.class_indices[str(predicted_class_index)],
+            "probabilities": {self.class_indices[str(i)]: float(p) for i, p in enumerate(probabilities)},
+        })
+
+    def _predict(self, body):
+        try:
+            # Decoding runs in this request thread; only the forward pass is batched
+            image = load_and_preprocess_image(io.BytesIO(body))[0]
+        except Exception:
+            metrics.count_error("decode")
+            self._send_json(400, {"error": "could not decode image"})
+            return None
+
+        try:
+            probabilities, fingerprint, predict_seconds = self.batcher.submit(image).result(
+                timeout=self.request_timeout)
+        except QueueFullError:
+            metrics.count_error("queue_full")
+            self._send_json(503, {"error": "busy, retry later"})
+            return None
+        except TimeoutError:
+            metrics.count_error("timeout")
+            self._send_json(504, {"error": "prediction timed out"})
+            return None
+        except Exception:
+            logger.exception("Prediction failed")
+            metrics.count_error("predict")
+            self._send_json(500, {"error": "prediction failed"})
+            return None
+        # The forward pass ran on the batcher thread; count it towards this request's log line too
+        metrics.record_stage("predict", predict_seconds)
+        # Stored under the model that actually ran, which differs from the lookup key if it was swapped meanwhile
+        self.cache.put(PredictionCache.make_key(body, fingerprint), probabilities)
+        return probabilities
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug(format, *args)
+
+
+# Function to build the server around the shared model, a prediction cache and a micro-batching queue
+def make_server(host="0.0.0.0", port=8080, max_batch_size=32, max_wait_ms=5, max_queue_size=1024):
+    registry = get_registry(model_path)
+    registry.get_model()
+
+    # Look the model up per batch so a swapped model file is picked up without a restart; every row
+    # comes back with the fingerprint of the model that produced it and the time of its batch's forward pass
+    def predict(batch):
+        model, fingerprint = registry.get_model_and_fingerprint()
+        start = time.perf_counter()
+        probabilities = get_engine(model).predict_proba(batch)
+        predict_seconds = time.perf_counter() - start
+        return [(row, fingerprint, predict_seconds) for row in probabilities]
+
+    batcher = MicroBatcher(predict, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms, max_queue_size=max_queue_size)
+    with open(f"{working_dir}/class_indices.json") as f:
+        class_indices = json.load(f)
+
+    handler = type("Handler", (PredictionHandler,), {
+        "batcher": batcher,
+        "class_indices": class_indices,
+        "cache": cache_from_env(),
+        "registry": registry,
+    })
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Plant disease inference service")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PLANT_SERVER_PORT", 8080)))
+    parser.add_argument("--max-batch-size", type=int, default=int(os.environ.get("PLANT_MAX_BATCH_SIZE", 32)))
+    parser.add_argument("--max-wait-ms", type=float, default=float(os.environ.get("PLANT_MAX_WAIT_MS", 5)))
+    parser.add_argument("--max-queue-size", type=int, default=1024)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    metrics.start_exporter()
+    server = make_server(args.host, args.port, args.max_batch_size, args.max_wait_ms, args.max_queue_size)
+    logger.info("Serving on %s:%d", args.host, args.port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
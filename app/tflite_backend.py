@@ -0,0 +1,65 @@
+import os
+import threading
+
+import numpy as np
+
+import metrics
+
+try:
+    # The standalone runtime is much smaller than TensorFlow on CPU-only nodes
+    from tflite_runtime.interpreter import Interpreter
+except ImportError:
+    import tensorflow as tf
+    Interpreter = tf.lite.Interpreter
+
+
+working_dir = os.path.dirname(os.path.abspath(__file__))
+
+backends = ("keras", "tflite-fp32", "tflite-dynamic", "tflite-int8")
+
+
+# Function to get the model file a backend loads, next to the Keras model in trained_model/
+def model_path_for_backend(backend, keras_model_path):
+    if backend not in backends:
+        raise ValueError(f"unknown backend {backend!r}, expected one of {', '.join(backends)}")
+    if backend == "keras":
+        return keras_model_path
+    base, _ = os.path.splitext(keras_model_path)
+    return f"{base}_{backend.split('-', 1)[1]}.tflite"
+
+
+# Runs a converted .tflite model with the same predict_proba interface as InferenceEngine
+class TFLiteEngine:
+    def __init__(self, model_path, num_threads=None):
+        self.model_path = model_path
+        self._interpreter = Interpreter(model_path=model_path, num_threads=num_threads)
+        self._interpreter.allocate_tensors()
+        self._input = self._interpreter.get_input_details()[0]
+        self._output = self._interpreter.get_output_details()[0]
+        self._batch_size = self._input["shape"][0]
+        # The interpreter holds its tensors in place, so only one invocation can run at a time
+        self._lock = threading.Lock()
+
+    # Full probability vectors, shape (N, num_classes)
+    def predict_proba(self, images):
+        images = np.asarray(images, dtype=np.float32)
+        input_scale, input_zero_point = self._input["quantization"]
+        if self._input["dtype"] != np.float32:
+            # Full-int8 models take quantized input
+            images = np.round(images / input_scale + input_zero_point)
+            images = np.clip(images, np.iinfo(self._input["dtype"]).min, np.iinfo(self._input["dtype"]).max)
+            images = images.astype(self._input["dtype"])
+
+        with self._lock, metrics.timed("predict"):
+            if images.shape[0] != self._batch_size:
+                self._interpreter.resize_tensor_input(self._input["index"], images.shape)
+                self._interpreter.allocate_tensors()
+                self._batch_size = images.shape[0]
+            self._interpreter.set_tensor(self._input["index"], images)
+            self._interpreter.invoke()
+            output = self._interpreter.get_tensor(self._output["index"])
+
+        output_scale, output_zero_point = self._output["quantization"]
+        if self._output["dtype"] != np.float32:
+            output = (output.astype(np.float32) - output_zero_point) * output_scale
+        return output
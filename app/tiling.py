@@ -0,0 +1,83 @@
+import io
+import time
+
+import numpy as np
+from PIL import Image
+
+import metrics
+from inference import get_engine, max_batch_size
+from prediction_cache import read_image_bytes
+
+
+tile_size = 224
+
+
+# Function to get the start offsets of overlapping tiles along one side; the last tile is aligned
+# to the edge so every pixel is covered
+def tile_offsets(length, size=tile_size, overlap=0.25):
+    if length <= size:
+        return [0]
+    stride = max(1, int(size * (1 - overlap)))
+    offsets = list(range(0, length - size + 1, stride))
+    if offsets[-1] != length - size:
+        offsets.append(length - size)
+    return offsets
+
+
+# Function to classify a large image tile by tile. Tiles are streamed through the model in batches of
+# at most batch_size, so memory for the model input stays fixed however large the photo is.
+# Returns the per-tile predictions, the mean class distribution over all tiles, a disease heatmap
+# (probability that the area is not healthy, one cell per heatmap_cell pixels) and tile throughput.
+def classify_tiles(model, image_path, class_indices, overlap=0.25, batch_size=None, heatmap_cell=16):
+    batch_size = min(batch_size or max_batch_size, max_batch_size)
+    engine = get_engine(model)
+
+    with metrics.timed("decode"):
+        img = Image.open(io.BytesIO(read_image_bytes(image_path))).convert('RGB')
+    # Photos smaller than one tile are classified whole
+    if min(img.size) < tile_size:
+        img = img.resize((max(img.size[0], tile_size), max(img.size[1], tile_size)))
+    pixels = np.asarray(img)
+    height, width = pixels.shape[:2]
+    positions = [(x, y) for y in tile_offsets(height, overlap=overlap) for x in tile_offsets(width, overlap=overlap)]
+
+    healthy = np.array(['healthy' in class_indices[str(i)] for i in range(len(class_indices))])
+    heat_sum = np.zeros((-(-height // heatmap_cell), -(-width // heatmap_cell)), dtype='float32')
+    heat_count = np.zeros_like(heat_sum)
+    distribution = np.zeros(len(class_indices), dtype='float64')
+    batch = np.empty((batch_size, tile_size, tile_size, 3), dtype='float32')
+    tiles = []
+
+    start = time.perf_counter()
+    for chunk_start in range(0, len(positions), batch_size):
+        chunk = positions[chunk_start:chunk_start + batch_size]
+        for i, (x, y) in enumerate(chunk):
+            np.multiply(pixels[y:y + tile_size, x:x + tile_size], 1 / 255., out=batch[i], casting='unsafe')
+        with metrics.timed("tiles"):
+            probabilities = engine.predict_proba(batch[:len(chunk)])
+        for (x, y), row in zip(chunk, probabilities):
+            index = int(np.argmax(row))
+            tiles.append({"x": x, "y": y, "class": class_indices[str(index)], "confidence": float(row[index])})
+            distribution += row
+            cells = (slice(y // heatmap_cell, -(-(y + tile_size) // heatmap_cell)),
+                     slice(x // heatmap_cell, -(-(x + tile_size) // heatmap_cell)))
+            heat_sum[cells] += 1. - float(row[healthy].sum())
+            heat_count[cells] += 1.
+    elapsed = time.perf_counter() - start
+
+    distribution /= len(positions)
+    return {
+        "tiles": tiles,
+        "distribution": distribution,
+        "class": class_indices[str(int(np.argmax(distribution)))],
+        "heatmap": np.divide(heat_sum, heat_count, out=np.zeros_like(heat_sum), where=heat_count > 0),
+        "tiles_per_sec": len(positions) / elapsed if elapsed else float('inf'),
+        "image_size": (width, height),
+    }
+
+
+# Function to draw the heatmap in red over a preview image, more opaque where disease is more likely
+def overlay_heatmap(preview, heatmap, max_alpha=0.6):
+    preview = preview.convert('RGB')
+    mask = Image.fromarray(np.uint8(np.clip(heatmap, 0, 1) * 255 * max_alpha)).resize(preview.size, Image.BILINEAR)
+    return Image.composite(Image.new('RGB', preview.size, (255, 0, 0)), preview, mask)
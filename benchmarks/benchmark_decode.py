@@ -0,0 +1,70 @@
+# Compares the old double full-resolution decode of an upload (preview + model input) with the
+# single draft-mode decode in decode_image, on the images in test_images/ and on upscaled copies
+# of them at phone-camera resolution
+#
+#   python benchmarks/benchmark_decode.py
+import os
+import sys
+import glob
+import time
+import argparse
+import tempfile
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "app"))
+
+from inference import decode_image  # noqa: E402
+
+
+repo_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+
+
+# What main.py did before: one decode for the preview, a second one for the model input
+def decode_twice(image_path):
+    Image.open(image_path).resize((256, 256))
+    img = Image.open(image_path).resize((224, 224))
+    return np.expand_dims(np.array(img), axis=0).astype('float32') / 255.
+
+
+def decode_once(image_path):
+    return decode_image(image_path, preview_size=(256, 256))
+
+
+def time_calls(fn, image_path, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn(image_path)
+        timings.append(time.perf_counter() - start)
+    return np.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the upload decode paths")
+    parser.add_argument("--images", default=os.path.join(repo_dir, "test_images"))
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--large-size", default="4032x3024", help="resolution of the upscaled copies")
+    args = parser.parse_args()
+
+    image_paths = sorted(glob.glob(os.path.join(args.images, "*")))
+    # The sample images are only 256x256, so also measure 12-megapixel JPEGs made from them
+    large_size = tuple(int(v) for v in args.large_size.split("x"))
+    tmp_dir = tempfile.mkdtemp()
+    for image_path in list(image_paths):
+        large_path = os.path.join(tmp_dir, "large_" + os.path.splitext(os.path.basename(image_path))[0] + ".jpg")
+        Image.open(image_path).convert("RGB").resize(large_size).save(large_path, quality=90)
+        image_paths.append(large_path)
+
+    print(f"{'image':<32}{'size':>12}{'twice ms':>10}{'once ms':>10}{'speedup':>9}")
+    for image_path in image_paths:
+        with Image.open(image_path) as img:
+            size = f"{img.size[0]}x{img.size[1]}"
+        twice = time_calls(decode_twice, image_path, args.repeats)
+        once = time_calls(decode_once, image_path, args.repeats)
+        print(f"{os.path.basename(image_path):<32}{size:>12}{twice:>10.2f}{once:>10.2f}{twice / once:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
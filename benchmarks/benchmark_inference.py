@@ -0,0 +1,61 @@
+# Compares the old model.predict path with the traced InferenceEngine on single images
+#
+#   python benchmarks/benchmark_inference.py --image test_images/test_apple_black_rot.JPG
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "app"))
+
+from model_registry import default_model_path, ModelRegistry  # noqa: E402
+from inference import InferenceEngine, configure_threads, load_and_preprocess_image  # noqa: E402
+
+
+def time_calls(fn, batch, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn(batch)
+        timings.append(time.perf_counter() - start)
+    timings = np.array(timings) * 1000
+    return {"mean_ms": timings.mean(), "p50_ms": np.percentile(timings, 50), "p99_ms": np.percentile(timings, 99)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark model.predict against InferenceEngine")
+    parser.add_argument("--model", default=default_model_path)
+    parser.add_argument("--image", default=None, help="image to classify; a random image is used if omitted")
+    parser.add_argument("--repeats", type=int, default=100)
+    parser.add_argument("--intra-op-threads", type=int, default=None)
+    parser.add_argument("--inter-op-threads", type=int, default=None)
+    args = parser.parse_args()
+
+    # Thread pools have to be sized before the model load initializes TF
+    configure_threads(args.intra_op_threads, args.inter_op_threads)
+    model = ModelRegistry(args.model, warm_up=False).get_model()
+    engine = InferenceEngine(model)
+
+    if args.image:
+        batch = load_and_preprocess_image(args.image)
+    else:
+        batch = np.random.rand(1, 224, 224, 3).astype("float32")
+
+    # Warm up both paths so tracing is not part of the measurement
+    model.predict(batch, verbose=0)
+    engine.predict_proba(batch)
+
+    results = {
+        "model.predict": time_calls(lambda b: model.predict(b, verbose=0), batch, args.repeats),
+        "InferenceEngine": time_calls(engine.predict_proba, batch, args.repeats),
+    }
+    for name, stats in results.items():
+        print(f"{name:<16} mean {stats['mean_ms']:8.2f} ms   p50 {stats['p50_ms']:8.2f} ms   p99 {stats['p99_ms']:8.2f} ms")
+    speedup = results["model.predict"]["mean_ms"] / results["InferenceEngine"]["mean_ms"]
+    print(f"speedup: {speedup:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+# Sends concurrent POST /predict requests to a running inference service and reports
+# requests/sec and latency percentiles. Every request carries a unique payload (the image bytes plus
+# a trailing nonce, which decoders ignore), so the server's prediction cache cannot answer it and the
+# forward passes really go through micro-batching; --repeat-payloads sends the images unchanged instead.
+#
+#   python benchmarks/load_generator.py --url http://localhost:8080/predict --concurrency 16 --requests 2000
+import os
+import glob
+import time
+import argparse
+import threading
+import urllib.request
+import urllib.error
+
+import numpy as np
+
+
+repo_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+
+
+def worker(url, payloads, counter, lock, total, latencies, errors, unique):
+    while True:
+        with lock:
+            if counter[0] >= total:
+                return
+            index = counter[0]
+            counter[0] += 1
+        payload = payloads[index % len(payloads)]
+        if unique:
+            payload += f"\0load-generator-{os.getpid()}-{index}".encode()
+        request = urllib.request.Request(url, data=payload,
+                                         headers={"Content-Type": "application/octet-stream"})
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request) as response:
+                response.read()
+            latencies.append(time.perf_counter() - start)
+        except (urllib.error.URLError, OSError):
+            errors.append(index)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load generator for the inference service")
+    parser.add_argument("--url", default="http://localhost:8080/predict")
+    parser.add_argument("--images", default=os.path.join(repo_dir, "test_images"),
+                        help="directory with the images to send")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--repeat-payloads", action="store_true",
+                        help="send the images unchanged, so repeats can be served from the prediction cache")
+    args = parser.parse_args()
+
+    payloads = []
+    for path in sorted(glob.glob(os.path.join(args.images, "*"))):
+        with open(path, "rb") as f:
+            payloads.append(f.read())
+    if not payloads:
+        parser.error(f"no images found in {args.images}")
+
+    counter, lock, latencies, errors = [0], threading.Lock(), [], []
+    threads = [threading.Thread(target=worker, args=(args.url, payloads, counter, lock, args.requests, latencies, errors,
+                                                        not args.repeat_payloads))
+               for _ in range(args.concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    print(f"requests: {len(latencies)} ok, {len(errors)} failed in {elapsed:.2f}s")
+    print(f"throughput: {len(latencies) / elapsed:.1f} requests/sec")
+    if latencies:
+        p50, p95, p99 = np.percentile(np.array(latencies) * 1000, [50, 95, 99])
+        print(f"latency: p50 {p50:.1f} ms   p95 {p95:.1f} ms   p99 {p99:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+# Benchmark suite for the inference path. `run` writes a JSON result file, `compare` flags
+# regressions between two result files.
+#
+#   python benchmarks/suite.py run --output baseline.json
+#   python benchmarks/suite.py run --output candidate.json
+#   python benchmarks/suite.py compare baseline.json candidate.json --threshold 0.10
+import io
+import os
+import sys
+import json
+import glob
+import time
+import platform
+import argparse
+import resource
+import subprocess
+
+import numpy as np
+from PIL import Image
+
+app_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "app")
+repo_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+sys.path.insert(0, app_dir)
+
+# Same defaults as model_registry, without importing TF before the cold-load measurement
+default_model_path = os.path.join(app_dir, "trained_model", "plant_disease_prediction_model.h5")
+default_backend = os.environ.get("PLANT_MODEL_BACKEND", "keras")
+
+batch_sizes = (1, 8, 32, 128)
+preprocess_sizes = ((256, 256), (1024, 768), (2048, 1536), (4032, 3024))
+
+
+# Each result records its unit and whether lower or higher is better, so compare needs no extra config
+def result(value, unit, better="lower"):
+    return {"value": float(value), "unit": unit, "better": better}
+
+
+def time_ms(fn, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return np.median(timings) * 1000
+
+
+# Function to make a deterministic JPEG of the given size in memory
+def synthetic_jpeg(size, seed=0):
+    rng = np.random.default_rng(seed)
+    # Smooth noise compresses and decodes more like a photo than white noise
+    small = rng.integers(0, 256, (size[1] // 16 + 1, size[0] // 16 + 1, 3), dtype=np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(small).resize(size, Image.BILINEAR).save(buffer, format="JPEG", quality=90)
+    return buffer.getvalue()
+
+
+# Runs in a fresh interpreter so the measurement includes importing TF and reading the model file
+def cold_load(model_path, backend):
+    start = time.perf_counter()
+    from model_registry import ModelRegistry
+    registry = ModelRegistry(model_path, backend=backend, warm_up=True)
+    registry.get_model()
+    print(json.dumps({"total_seconds": time.perf_counter() - start, "load_seconds": registry.load_seconds,
+                      "warm_up_seconds": registry.warm_up_seconds}))
+
+
+def run(args):
+    results = {}
+
+    output = subprocess.run([sys.executable, os.path.abspath(__file__), "cold-load", "--model", args.model,
+                             "--backend", args.backend], check=True, capture_output=True, text=True)
+    cold = json.loads(output.stdout.strip().splitlines()[-1])
+    results["cold_load_total_s"] = result(cold["total_seconds"], "s")
+    results["cold_load_model_s"] = result(cold["load_seconds"], "s")
+    if cold["warm_up_seconds"] is not None:
+        results["cold_load_warm_up_s"] = result(cold["warm_up_seconds"], "s")
+
+    from model_registry import ModelRegistry
+    from inference import get_engine, load_and_preprocess_image, load_and_preprocess_images, predict_image_class
+
+    with open(os.path.join(app_dir, "class_indices.json")) as f:
+        class_indices = json.load(f)
+    model = ModelRegistry(args.model, backend=args.backend).get_model()
+    engine = get_engine(model)
+
+    for image_path in sorted(glob.glob(os.path.join(repo_dir, "test_images", "*"))):
+        name = os.path.splitext(os.path.basename(image_path))[0]
+        results[f"single_image_ms[{name}]"] = result(
+            time_ms(lambda: predict_image_class(model, image_path, class_indices), args.repeats), "ms")
+
+    jpeg = synthetic_jpeg((256, 256))
+    for batch_size in batch_sizes:
+        batch = load_and_preprocess_images([io.BytesIO(jpeg) for _ in range(batch_size)])
+        engine.predict_proba(batch)
+        elapsed = time_ms(lambda: engine.predict_proba(batch), max(args.repeats // batch_size, 3))
+        results[f"throughput_images_per_s[batch={batch_size}]"] = result(
+            batch_size / (elapsed / 1000), "images/s", better="higher")
+
+    for size in preprocess_sizes:
+        data = synthetic_jpeg(size)
+        results[f"preprocess_ms[{size[0]}x{size[1]}]"] = result(
+            time_ms(lambda: load_and_preprocess_image(io.BytesIO(data)), args.repeats), "ms")
+
+    # Linux reports kilobytes, macOS bytes
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    results["peak_rss_mb"] = result(peak / (2 ** 20 if sys.platform == "darwin" else 2 ** 10), "MB")
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpu_count": os.cpu_count(),
+            "model": os.path.abspath(args.model),
+            "backend": args.backend,
+            "repeats": args.repeats,
+        },
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    for name, entry in results.items():
+        print(f"{name:<48}{entry['value']:>12.2f} {entry['unit']}")
+    print(f"\nresults written to {args.output}")
+
+
+# Flags metrics that got worse by more than threshold (a fraction, 0.1 = 10%) and exits non-zero if any did
+def compare(args):
+    with open(args.baseline) as f:
+        baseline = json.load(f)["results"]
+    with open(args.candidate) as f:
+        candidate = json.load(f)["results"]
+
+    regressions = []
+    print(f"{'metric':<48}{'baseline':>12}{'candidate':>12}{'change':>9}")
+    for name in sorted(set(baseline) & set(candidate)):
+        old, new = baseline[name]["value"], candidate[name]["value"]
+        change = (new - old) / old if old else 0.
+        worse = change > args.threshold if baseline[name]["better"] == "lower" else change < -args.threshold
+        flag = "  REGRESSION" if worse else ""
+        print(f"{name:<48}{old:>12.2f}{new:>12.2f}{change:>+9.1%}{flag}")
+        if worse:
+            regressions.append(name)
+    for name in sorted(set(baseline) ^ set(candidate)):
+        print(f"{name:<48}  only in {'baseline' if name in baseline else 'candidate'}")
+
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) above {args.threshold:.0%}")
+        sys.exit(1)
+    print(f"\nno regressions above {args.threshold:.0%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark suite for the inference path")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="run the benchmarks and write a JSON result file")
+    run_parser.add_argument("--output", default="benchmark_results.json")
+    run_parser.add_argument("--model", default=default_model_path)
+    run_parser.add_argument("--backend", default=default_backend)
+    run_parser.add_argument("--repeats", type=int, default=50)
+
+    compare_parser = subparsers.add_parser("compare", help="compare two result files")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("candidate")
+    compare_parser.add_argument("--threshold", type=float, default=0.10,
+                                help="relative change that counts as a regression (default 0.10)")
+
+    cold_parser = subparsers.add_parser("cold-load", help=argparse.SUPPRESS)
+    cold_parser.add_argument("--model", required=True)
+    cold_parser.add_argument("--backend", required=True)
+
+    args = parser.parse_args()
+    if args.command == "run":
+        run(args)
+    elif args.command == "compare":
+        compare(args)
+    else:
+        cold_load(args.model, args.backend)
+
+
+if __name__ == "__main__":
+    main()
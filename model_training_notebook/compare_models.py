@@ -0,0 +1,101 @@
+# Compares trained model files side by side: parameter count, file size, cold load, per-image CPU
+# latency and, given packed shards (see shards.py), validation accuracy.
+#
+#   python compare_models.py ../app/trained_model/plant_disease_prediction_model.h5 \
+#       ../app/trained_model/plant_disease_prediction_model_gap.h5 --shards shards
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+
+# Latency is reported for CPU-only nodes, so keep TF off any GPU
+os.environ.setdefault("CUDA_VISIBLE_DEVICES", "-1")
+
+import numpy as np  # noqa: E402
+
+
+# Runs in a fresh interpreter so every model pays the same TF start-up and file read
+def cold_load(model_path):
+    start = time.perf_counter()
+    import tensorflow as tf
+
+    tf.keras.models.load_model(model_path)
+    print(json.dumps({"cold_load_seconds": time.perf_counter() - start}))
+
+
+def measure(model_path, repeats, shards, batch_size):
+    import tensorflow as tf
+
+    output = subprocess.run([sys.executable, os.path.abspath(__file__), "--cold-load", model_path],
+                            check=True, capture_output=True, text=True)
+    row = json.loads(output.stdout.strip().splitlines()[-1])
+
+    model = tf.keras.models.load_model(model_path)
+    row["model"] = os.path.basename(model_path)
+    row["parameters"] = int(model.count_params())
+    row["file_size_mb"] = os.path.getsize(model_path) / 2 ** 20
+
+    forward = tf.function(lambda images: model(images, training=False),
+                          input_signature=[tf.TensorSpec((None,) + tuple(model.input_shape[1:]), tf.float32)])
+    image = tf.constant(np.random.default_rng(0).random((1,) + tuple(model.input_shape[1:]), dtype=np.float32))
+    forward(image)
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        forward(image).numpy()
+        timings.append(time.perf_counter() - start)
+    row["latency_ms"] = float(np.median(timings) * 1000)
+
+    if shards:
+        from shards import ShardDataset, evaluate
+
+        row["validation_accuracy"] = evaluate(model, ShardDataset(shards), "validation", batch_size)["accuracy"]
+    return row
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare model files side by side")
+    parser.add_argument("models", nargs="*", help="model files; the first one is the reference")
+    parser.add_argument("--shards", default=None, help="packed shards for validation accuracy")
+    parser.add_argument("--repeats", type=int, default=100)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--report", default=None, help="where to write the JSON report")
+    parser.add_argument("--cold-load", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.cold_load:
+        cold_load(args.cold_load)
+        return
+    if not args.models:
+        parser.error("at least one model file is required")
+
+    rows = [measure(path, args.repeats, args.shards, args.batch_size) for path in args.models]
+
+    header = f"{'model':<44}{'params':>13}{'size MB':>10}{'cold load s':>13}{'latency ms':>12}"
+    if args.shards:
+        header += f"{'val acc':>10}"
+    print(header)
+    for row in rows:
+        line = (f"{row['model']:<44}{row['parameters']:>13,}{row['file_size_mb']:>10.1f}"
+                f"{row['cold_load_seconds']:>13.2f}{row['latency_ms']:>12.2f}")
+        if args.shards:
+            line += f"{row['validation_accuracy'] * 100:>9.2f}%"
+        print(line)
+
+    if args.shards and len(rows) > 1:
+        reference = rows[0]
+        for row in rows[1:]:
+            delta = (row["validation_accuracy"] - reference["validation_accuracy"]) * 100
+            print(f"{row['model']}: {delta:+.2f} accuracy points, "
+                  f"{reference['file_size_mb'] / row['file_size_mb']:.1f}x smaller, "
+                  f"{reference['latency_ms'] / row['latency_ms']:.1f}x faster than {reference['model']}")
+
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,25 @@
+# Dataset layout shared by train.py and shards.py; kept free of TensorFlow so packing and reading
+# the shards only needs numpy and PIL
+import os
+
+
+image_extensions = (".jpg", ".jpeg", ".png")
+
+# Image Parameters
+img_size = 224
+
+
+# Function to list the images with the same 80/20 split as
+# ImageDataGenerator(validation_split=0.2).flow_from_directory: per class, the first 20% of the
+# sorted file names are validation and the rest training
+def split_dataset(base_dir, validation_split=0.2):
+    class_names = sorted(d for d in os.listdir(base_dir) if os.path.isdir(os.path.join(base_dir, d)))
+    train, validation = ([], []), ([], [])
+    for label, class_name in enumerate(class_names):
+        class_dir = os.path.join(base_dir, class_name)
+        files = sorted(f for f in os.listdir(class_dir) if f.lower().endswith(image_extensions))
+        split = int(validation_split * len(files))
+        for subset, subset_files in ((validation, files[:split]), (train, files[split:])):
+            subset[0].extend(os.path.join(class_dir, f) for f in subset_files)
+            subset[1].extend([label] * len(subset_files))
+    return class_names, train, validation
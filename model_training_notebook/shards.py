@@ -0,0 +1,162 @@
+# Packs the PlantVillage images once into memory-mappable uint8 shards and reads them back without
+# decoding, so repeated evaluation of candidate models does no JPEG work and keeps RAM bounded.
+#
+#   python shards.py pack --data "plantvillage dataset/color" --output shards
+#   python shards.py evaluate --shards shards --model ../app/trained_model/plant_disease_prediction_model.h5
+import os
+import json
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+from dataset import img_size, split_dataset
+
+
+manifest_name = "manifest.json"
+
+
+# Function to decode one image the way the app does before inference, but kept as uint8
+def load_uint8(path):
+    img = Image.open(path)
+    img.draft('RGB', (img_size, img_size))
+    return np.asarray(img.convert('RGB').resize((img_size, img_size)), dtype=np.uint8)
+
+
+# Function to write the shards, labels and manifest; training images come first, then validation,
+# using the same split as train.py
+def pack(base_dir, output_dir, shard_size=4096, workers=None):
+    class_names, (train_paths, train_labels), (val_paths, val_labels) = split_dataset(base_dir)
+    paths = train_paths + val_paths
+    os.makedirs(output_dir, exist_ok=True)
+    np.save(os.path.join(output_dir, "labels.npy"), np.array(train_labels + val_labels, dtype=np.int16))
+
+    shards = []
+    # A few images per worker (ThreadPoolExecutor's default worker count if none is given)
+    window = (workers or min(32, (os.cpu_count() or 1) + 4)) * 4
+    start_time = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for start in range(0, len(paths), shard_size):
+            shard_paths = paths[start:start + shard_size]
+            file_name = f"images_{len(shards):05d}.npy"
+            # Written straight into the memory-mapped file; images are decoded in windows of a few per
+            # worker, so at most one window of decoded images is held in RAM
+            shard = np.lib.format.open_memmap(os.path.join(output_dir, file_name), mode="w+", dtype=np.uint8,
+                                              shape=(len(shard_paths), img_size, img_size, 3))
+            for window_start in range(0, len(shard_paths), window):
+                window_paths = shard_paths[window_start:window_start + window]
+                for i, image in enumerate(pool.map(load_uint8, window_paths), window_start):
+                    shard[i] = image
+            shard.flush()
+            del shard
+            shards.append({"file": file_name, "start": start, "count": len(shard_paths)})
+            print(f"{start + len(shard_paths)}/{len(paths)} images packed, "
+                  f"{(start + len(shard_paths)) / (time.perf_counter() - start_time):.1f} images/sec")
+
+    manifest = {
+        "image_size": img_size,
+        "dtype": "uint8",
+        "total": len(paths),
+        "shard_size": shard_size,
+        "shards": shards,
+        "subsets": {"train": [0, len(train_paths)], "validation": [len(train_paths), len(paths)]},
+        "class_indices": {str(i): name for i, name in enumerate(class_names)},
+        "files": [os.path.relpath(path, base_dir) for path in paths],
+    }
+    with open(os.path.join(output_dir, manifest_name), "w") as f:
+        json.dump(manifest, f)
+    return manifest
+
+
+# Reads packed shards through memory maps; images stay uint8 on disk until a batch is requested
+class ShardDataset:
+    def __init__(self, shard_dir):
+        with open(os.path.join(shard_dir, manifest_name)) as f:
+            self.manifest = json.load(f)
+        self.class_indices = self.manifest["class_indices"]
+        self.labels = np.load(os.path.join(shard_dir, "labels.npy"), mmap_mode="r")
+        self._shards = [np.load(os.path.join(shard_dir, shard["file"]), mmap_mode="r")
+                        for shard in self.manifest["shards"]]
+        self._starts = np.array([shard["start"] for shard in self.manifest["shards"]])
+
+    def __len__(self):
+        return self.manifest["total"]
+
+    def subset_indices(self, subset):
+        start, stop = self.manifest["subsets"][subset]
+        return np.arange(start, stop)
+
+    # Function to gather the uint8 images for global indices; a contiguous run within one shard is a
+    # zero-copy view into the memory map
+    def images(self, indices):
+        indices = np.asarray(indices)
+        shard_ids = np.searchsorted(self._starts, indices, side="right") - 1
+        if len(indices) and shard_ids[0] == shard_ids[-1] and np.all(np.diff(indices) == 1):
+            local = indices[0] - self._starts[shard_ids[0]]
+            return self._shards[shard_ids[0]][local:local + len(indices)]
+        out = np.empty((len(indices), img_size, img_size, 3), dtype=np.uint8)
+        for shard_id in np.unique(shard_ids):
+            mask = shard_ids == shard_id
+            out[mask] = self._shards[shard_id][indices[mask] - self._starts[shard_id]]
+        return out
+
+    # Yields (float32 images in [0, 1], int labels) batches; the float conversion happens per batch,
+    # so memory use depends on batch_size and not on the dataset size
+    def batches(self, subset="validation", batch_size=32, shuffle=False, seed=0):
+        indices = self.subset_indices(subset)
+        if shuffle:
+            indices = np.random.default_rng(seed).permutation(indices)
+        for start in range(0, len(indices), batch_size):
+            batch_indices = indices[start:start + batch_size]
+            if shuffle:
+                # Reading in file order keeps page-cache access sequential within the batch
+                batch_indices = np.sort(batch_indices)
+            yield self.images(batch_indices).astype(np.float32) / 255., np.asarray(self.labels[batch_indices])
+
+
+# Function to compute the accuracy of a Keras model on one subset of the shards
+def evaluate(model, dataset, subset="validation", batch_size=64):
+    correct = total = 0
+    start = time.perf_counter()
+    for images, labels in dataset.batches(subset, batch_size):
+        predictions = np.argmax(model.predict_on_batch(images), axis=1)
+        correct += int(np.sum(predictions == labels))
+        total += len(labels)
+    elapsed = time.perf_counter() - start
+    return {"accuracy": correct / max(total, 1), "images": total, "seconds": elapsed,
+            "images_per_sec": total / max(elapsed, 1e-9)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pack PlantVillage into uint8 shards or evaluate a model on them")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    pack_parser = subparsers.add_parser("pack", help="decode the images once and write the shards")
+    pack_parser.add_argument("--data", default="plantvillage dataset/color")
+    pack_parser.add_argument("--output", default="shards")
+    pack_parser.add_argument("--shard-size", type=int, default=4096, help="images per shard (~600 MB at 4096)")
+    pack_parser.add_argument("--workers", type=int, default=None)
+
+    evaluate_parser = subparsers.add_parser("evaluate", help="accuracy of a model on the packed shards")
+    evaluate_parser.add_argument("--shards", default="shards")
+    evaluate_parser.add_argument("--model", required=True)
+    evaluate_parser.add_argument("--subset", default="validation", choices=("train", "validation"))
+    evaluate_parser.add_argument("--batch-size", type=int, default=64)
+
+    args = parser.parse_args()
+    if args.command == "pack":
+        manifest = pack(args.data, args.output, args.shard_size, args.workers)
+        print(f"wrote {len(manifest['shards'])} shards with {manifest['total']} images to {args.output}")
+    else:
+        import tensorflow as tf
+
+        result = evaluate(tf.keras.models.load_model(args.model), ShardDataset(args.shards), args.subset,
+                          args.batch_size)
+        print(f"{args.subset} accuracy: {result['accuracy'] * 100:.2f}% on {result['images']} images, "
+              f"{result['images_per_sec']:.1f} images/sec")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+# Trains the plant disease model from Plant_disease_classification.ipynb with a tf.data input
+# pipeline instead of ImageDataGenerator, and writes the artifacts the app loads.
+#
+#   python train.py --data "plantvillage dataset/color" --output-dir ../app
+#   python train.py --data "plantvillage dataset/color" --benchmark-input 200
+import os
+import json
+import time
+import random
+import hashlib
+import argparse
+
+import numpy as np
+import tensorflow as tf
+from tensorflow.keras import layers, models
+
+from dataset import img_size, split_dataset
+
+
+# Image Parameters
+batch_size = 32
+
+
+# Set seeds for reproducibility
+def set_seeds(seed=0):
+    random.seed(seed)
+    np.random.seed(seed)
+    tf.random.set_seed(seed)
+
+
+# Function to decode and resize one image; kept as uint8 so the on-disk cache is 4x smaller than float32
+def decode_image(path, label, resize_method="nearest"):
+    image = tf.io.decode_image(tf.io.read_file(path), channels=3, expand_animations=False)
+    image = tf.image.resize(image, (img_size, img_size), method=resize_method)
+    return tf.cast(tf.round(image), tf.uint8), label
+
+
+# Function to name a tf.data cache file after everything that decides its contents: the image size,
+# the resize method and the exact file list (which covers the data directory), so a run on other data
+# or with another resize method never reads a stale cache
+def cache_file_name(subset, paths, resize_method):
+    digest = hashlib.sha256("\n".join([str(img_size), resize_method] + [os.path.abspath(path) for path in paths])
+                            .encode()).hexdigest()[:16]
+    return f"{subset}_{img_size}_{digest}"
+
+
+# Function to build the tf.data pipeline: parallel decode -> disk cache -> shuffle -> batch -> scale -> prefetch
+def make_dataset(paths, labels, num_classes, cache_file=None, shuffle=False, seed=0, resize_method="nearest",
+                 shuffle_buffer=4096, batch_size=batch_size):
+    dataset = tf.data.Dataset.from_tensor_slices((paths, labels))
+    if shuffle:
+        # Shuffle the file list once up front so the cache does not hold the images class by class
+        dataset = dataset.shuffle(len(paths), seed=seed, reshuffle_each_iteration=False)
+    dataset = dataset.map(lambda path, label: decode_image(path, label, resize_method),
+                          num_parallel_calls=tf.data.AUTOTUNE, deterministic=False)
+    if cache_file is not None:
+        # The first epoch decodes the JPEGs and fills the cache; later epochs only read it back
+        dataset = dataset.cache(cache_file)
+    if shuffle:
+        dataset = dataset.shuffle(shuffle_buffer, seed=seed, reshuffle_each_iteration=True)
+    dataset = dataset.batch(batch_size)
+    dataset = dataset.map(lambda images, labels: (tf.cast(images, tf.float32) / 255., tf.one_hot(labels, num_classes)),
+                          num_parallel_calls=tf.data.AUTOTUNE)
+    return dataset.prefetch(tf.data.AUTOTUNE)
+
+
+# Model Definition, as in the notebook. Flatten feeds 54x54x64 = 186,624 values into Dense(256),
+# so that one layer holds ~47.8M parameters, over 99% of the model.
+def build_baseline_model(num_classes):
+    model = models.Sequential()
+
+    model.add(layers.Conv2D(32, (3, 3), activation='relu', input_shape=(img_size, img_size, 3)))
+    model.add(layers.MaxPooling2D(2, 2))
+
+    model.add(layers.Conv2D(64, (3, 3), activation='relu'))
+    model.add(layers.MaxPooling2D(2, 2))
+
+    model.add(layers.Flatten())
+    model.add(layers.Dense(256, activation='relu'))
+    model.add(layers.Dense(num_classes, activation='softmax'))
+    return model
+
+
+# Same convolutional stem with one more conv block, and global average pooling instead of Flatten,
+# so Dense(256) sees 128 values instead of 186,624
+def build_gap_model(num_classes):
+    model = models.Sequential()
+
+    model.add(layers.Conv2D(32, (3, 3), activation='relu', input_shape=(img_size, img_size, 3)))
+    model.add(layers.MaxPooling2D(2, 2))
+
+    model.add(layers.Conv2D(64, (3, 3), activation='relu'))
+    model.add(layers.MaxPooling2D(2, 2))
+
+    model.add(layers.Conv2D(128, (3, 3), activation='relu'))
+    model.add(layers.MaxPooling2D(2, 2))
+
+    model.add(layers.GlobalAveragePooling2D())
+    model.add(layers.Dense(256, activation='relu'))
+    model.add(layers.Dense(num_classes, activation='softmax'))
+    return model
+
+
+# Depthwise-separable blocks after a regular first conv, then global average pooling
+def build_separable_model(num_classes):
+    model = models.Sequential()
+
+    model.add(layers.Conv2D(32, (3, 3), activation='relu', input_shape=(img_size, img_size, 3)))
+    model.add(layers.MaxPooling2D(2, 2))
+
+    for filters in (64, 128, 256):
+        model.add(layers.SeparableConv2D(filters, (3, 3), activation='relu', padding='same'))
+        model.add(layers.MaxPooling2D(2, 2))
+
+    model.add(layers.GlobalAveragePooling2D())
+    model.add(layers.Dense(256, activation='relu'))
+    model.add(layers.Dense(num_classes, activation='softmax'))
+    return model
+
+
+# Every variant keeps Dense(256) as the penultimate layer and the app's 224x224x3 input
+architectures = {
+    "baseline": build_baseline_model,
+    "gap": build_gap_model,
+    "separable": build_separable_model,
+}
+
+
+def build_model(num_classes, architecture="baseline"):
+    return architectures[architecture](num_classes)
+
+
+# Logs the duration and input throughput of every epoch
+class EpochTimer(tf.keras.callbacks.Callback):
+    def __init__(self, images_per_epoch):
+        super().__init__()
+        self.images_per_epoch = images_per_epoch
+        self.epoch_seconds = []
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self._start = time.perf_counter()
+
+    def on_epoch_end(self, epoch, logs=None):
+        elapsed = time.perf_counter() - self._start
+        self.epoch_seconds.append(elapsed)
+        print(f"epoch {epoch + 1}: {elapsed:.1f}s, {self.images_per_epoch / elapsed:.1f} images/sec")
+
+
+# Function to measure input throughput alone (no training) for tf.data and for the notebook's generator
+def benchmark_input(base_dir, dataset, num_batches, batch_size=batch_size):
+    from tensorflow.keras.preprocessing.image import ImageDataGenerator
+
+    generator = ImageDataGenerator(rescale=1. / 255, validation_split=0.2).flow_from_directory(
+        base_dir, target_size=(img_size, img_size), batch_size=batch_size, subset='training',
+        class_mode='categorical')
+    results = {}
+    for name, batches in (("ImageDataGenerator", generator), ("tf.data", iter(dataset.repeat()))):
+        next(batches)
+        start = time.perf_counter()
+        for _ in range(num_batches):
+            next(batches)
+        results[name] = num_batches * batch_size / (time.perf_counter() - start)
+        print(f"{name:<20}{results[name]:>10.1f} images/sec")
+    print(f"speedup: {results['tf.data'] / results['ImageDataGenerator']:.1f}x")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the plant disease model with a tf.data pipeline")
+    parser.add_argument("--data", default="plantvillage dataset/color", help="PlantVillage class folders")
+    parser.add_argument("--output-dir", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "app"),
+                        help="where class_indices.json and trained_model/ are written")
+    parser.add_argument("--architecture", default="baseline", choices=sorted(architectures))
+    parser.add_argument("--model-name", default=None,
+                        help="model file name in trained_model/; defaults to plant_disease_prediction_model.h5 "
+                             "for the baseline and plant_disease_prediction_model_<architecture>.h5 otherwise")
+    parser.add_argument("--epochs", type=int, default=5)
+    parser.add_argument("--batch-size", type=int, default=batch_size)
+    parser.add_argument("--cache-dir", default="tf_data_cache",
+                        help="directory for the decoded-image cache, reused across runs on the same data; "
+                             "pass an empty string to disable")
+    parser.add_argument("--resize-method", default="nearest",
+                        help="tf.image.resize method; nearest matches flow_from_directory")
+    parser.add_argument("--benchmark-input", type=int, default=0, metavar="BATCHES",
+                        help="only compare input throughput of tf.data and ImageDataGenerator over this many batches")
+    args = parser.parse_args()
+
+    set_seeds(0)
+    class_names, (train_paths, train_labels), (val_paths, val_labels) = split_dataset(args.data)
+    num_classes = len(class_names)
+    print(f"Found {len(train_paths)} training and {len(val_paths)} validation images in {num_classes} classes")
+
+    cache_files = (None, None)
+    if args.cache_dir:
+        os.makedirs(args.cache_dir, exist_ok=True)
+        cache_files = (os.path.join(args.cache_dir, cache_file_name("train", train_paths, args.resize_method)),
+                       os.path.join(args.cache_dir, cache_file_name("val", val_paths, args.resize_method)))
+    train_dataset = make_dataset(train_paths, train_labels, num_classes, cache_files[0], shuffle=True,
+                                 resize_method=args.resize_method, batch_size=args.batch_size)
+    validation_dataset = make_dataset(val_paths, val_labels, num_classes, cache_files[1],
+                                      resize_method=args.resize_method, batch_size=args.batch_size)
+
+    if args.benchmark_input:
+        benchmark_input(args.data, train_dataset, args.benchmark_input, args.batch_size)
+        return
+
+    model = build_model(num_classes, args.architecture)
+    model.summary()
+    # Compile the Model
+    model.compile(optimizer='adam',
+                  loss='categorical_crossentropy',
+                  metrics=['accuracy'])
+
+    # Training the Model
+    timer = EpochTimer(len(train_paths))
+    model.fit(train_dataset, epochs=args.epochs, validation_data=validation_dataset, callbacks=[timer])
+
+    # Model Evaluation
+    val_loss, val_accuracy = model.evaluate(validation_dataset)
+    print(f"Validation Accuracy: {val_accuracy * 100:.2f}%")
+    print(f"Mean epoch time: {np.mean(timer.epoch_seconds):.1f}s")
+
+    # Saving the model and the class names the app loads
+    os.makedirs(os.path.join(args.output_dir, "trained_model"), exist_ok=True)
+    model_name = args.model_name or ("plant_disease_prediction_model.h5" if args.architecture == "baseline"
+                                     else f"plant_disease_prediction_model_{args.architecture}.h5")
+    model_path = os.path.join(args.output_dir, "trained_model", model_name)
+    model.save(model_path)
+    class_indices = {str(i): name for i, name in enumerate(class_names)}
+    with open(os.path.join(args.output_dir, "class_indices.json"), "w") as f:
+        json.dump(class_indices, f)
+    print(f"Saved {model_path}")
+
+
+if __name__ == "__main__":
+    main()